@@ -1,12 +1,48 @@
 from flask import Flask, render_template, request, redirect, url_for, session, jsonify, flash
 from database import Database
+from storage import DBAPIBackend, PoolExhausted
 from validation import validate_student_data, sanitize_student_data
+from compression import compress_response
+from rate_limit import RateLimiter, SQLiteBucketStore
+from trigram import can_fuzzy_match
 from functools import wraps
+import math
 import os
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 app = Flask(__name__)
 app.secret_key = os.urandom(24)
-db = Database()
+app.json.compact = True
+
+# Point DATABASE_DRIVER at a DB-API module (e.g. psycopg2) and DATABASE_DSN at
+# its connection string to share one server database across several app nodes.
+backend = None
+if os.environ.get('DATABASE_DRIVER'):
+    backend = DBAPIBackend(
+        os.environ['DATABASE_DRIVER'],
+        os.environ.get('DATABASE_DSN', ''),
+        pool_size=int(os.environ.get('DATABASE_POOL_SIZE', 5))
+    )
+
+# ROSTER_SNAPSHOT=1 serves listing/search from memory; only safe when this
+# process is the sole writer to the database.
+db = Database(backend=backend, snapshot=os.environ.get('ROSTER_SNAPSHOT') == '1')
+
+# (burst, period_seconds) per endpoint. Set RATE_LIMIT_DB to a SQLite file
+# path so every worker process on the host draws from the same buckets.
+RATE_LIMITS = {
+    'login': (5, 60),
+    'register': (3, 60),
+    'search': (30, 10)
+}
+limiter = RateLimiter(
+    RATE_LIMITS,
+    SQLiteBucketStore(os.environ['RATE_LIMIT_DB']) if os.environ.get('RATE_LIMIT_DB') else None
+)
 
 def login_required(f):
     @wraps(f)
@@ -17,6 +53,102 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def rate_limited(rule, methods=('GET', 'POST'), template=None):
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if request.method in methods:
+                caller = session.get('user_id') or request.remote_addr
+                retry_after = limiter.hit(rule, caller)
+                if retry_after:
+                    unit = 'second' if retry_after == 1 else 'seconds'
+                    message = f'Too many requests. Please try again in {retry_after} {unit}.'
+                    if template:
+                        flash(message, 'error')
+                        response = app.make_response((render_template(template), 429))
+                    else:
+                        response = jsonify({'success': False, 'message': message})
+                        response.status_code = 429
+                    response.headers['Retry-After'] = str(retry_after)
+                    return response
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+
+STUDENT_FIELDS = ('id', 'student_id', 'first_name', 'middle_name', 'last_name', 'email', 'phone',
+                  'course', 'department', 'year_level', 'enrollment_date', 'status')
+
+
+def student_values(student):
+    return (
+        student[0],
+        student[1],
+        student[2],
+        student[10] if len(student) > 10 and student[10] else '',
+        student[3],
+        student[4] if student[4] else '',
+        student[5] if student[5] else '',
+        student[6],
+        student[11] if len(student) > 11 and student[11] else '',
+        student[7] if student[7] else '',
+        student[8] if student[8] else '',
+        student[9]
+    )
+
+
+def json_response(payload):
+    # Use orjson when installed for large pages. Both paths fall back to
+    # Flask's encoder for values such as the datetime enrollment_date some
+    # DB-API drivers return, so the output is the same either way.
+    if orjson is not None:
+        body = orjson.dumps(payload, default=app.json.default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+    else:
+        body = app.json.dumps(payload)
+    return app.response_class(body, mimetype='application/json')
+
+
+def students_response(students, page, per_page, match='exact'):
+    total_records = len(students)
+    
+    start_idx = (page - 1) * per_page
+    end_idx = start_idx + per_page
+    rows = [student_values(student) for student in students[start_idx:end_idx]]
+    
+    payload = {
+        'success': True,
+        'match': match,
+        'pagination': {
+            'page': page,
+            'per_page': per_page,
+            'total': total_records,
+            'total_pages': (total_records + per_page - 1) // per_page
+        }
+    }
+    
+    # format=compact sends the field names once and each student as an array.
+    if request.args.get('format') == 'compact':
+        payload['columns'] = STUDENT_FIELDS
+        payload['rows'] = rows
+    else:
+        payload['students'] = [dict(zip(STUDENT_FIELDS, row)) for row in rows]
+    
+    return json_response(payload)
+
+
+@app.errorhandler(PoolExhausted)
+def database_busy(error):
+    response = jsonify({'success': False, 'message': 'The server is busy. Please try again in a moment.'})
+    response.status_code = 503
+    response.headers['Retry-After'] = '5'
+    return response
+
+
+@app.after_request
+def compress(response):
+    return compress_response(response, request.accept_encodings)
+
+
 @app.route('/')
 def index():
     if 'user_id' in session:
@@ -25,6 +157,7 @@ def index():
 
 
 @app.route('/login', methods=['GET', 'POST'])
+@rate_limited('login', methods=('POST',), template='login.html')
 def login():
     if request.method == 'POST':
         username = request.form.get('username', '').strip()
@@ -55,6 +188,7 @@ def login():
 
 
 @app.route('/register', methods=['GET', 'POST'])
+@rate_limited('register', methods=('POST',), template='register.html')
 def register():
     if request.method == 'POST':
         first_name = request.form.get('first_name', '').strip()
@@ -107,43 +241,12 @@ def get_students():
     per_page = min(max(1, per_page), 100)
     
     students = db.get_all_students(sort_column=sort_column, sort_direction=sort_direction)
-    total_records = len(students)
-    
-    start_idx = (page - 1) * per_page
-    end_idx = start_idx + per_page
-    paginated_students = students[start_idx:end_idx]
-
-    students_list = []
-    for student in paginated_students:
-        students_list.append({
-            'id': student[0],
-            'student_id': student[1],
-            'first_name': student[2],
-            'middle_name': student[10] if len(student) > 10 and student[10] else '',
-            'last_name': student[3],
-            'email': student[4] if student[4] else '',
-            'phone': student[5] if student[5] else '',
-            'course': student[6],
-            'department': student[11] if len(student) > 11 and student[11] else '',
-            'year_level': student[7] if student[7] else '',
-            'enrollment_date': student[8] if student[8] else '',
-            'status': student[9]
-        })
-    
-    return jsonify({
-        'success': True,
-        'students': students_list,
-        'pagination': {
-            'page': page,
-            'per_page': per_page,
-            'total': total_records,
-            'total_pages': (total_records + per_page - 1) // per_page
-        }
-    })
+    return students_response(students, page, per_page)
 
 
 @app.route('/api/students/search', methods=['GET'])
 @login_required
+@rate_limited('search')
 def search_students():
     search_term = request.args.get('query', '')
     page = request.args.get('page', 1, type=int)
@@ -155,43 +258,29 @@ def search_students():
     page = max(1, page)
     per_page = min(max(1, per_page), 100)
     
+    threshold = request.args.get('threshold', type=float)
+    
     if not search_term:
         return get_students()
     
-    students = db.search_student(search_term, sort_column=sort_column, sort_direction=sort_direction)
-    total_records = len(students)
-    
-    start_idx = (page - 1) * per_page
-    end_idx = start_idx + per_page
-    paginated_students = students[start_idx:end_idx]
-    
-    students_list = []
-    for student in paginated_students:
-        students_list.append({
-            'id': student[0],
-            'student_id': student[1],
-            'first_name': student[2],
-            'middle_name': student[10] if len(student) > 10 and student[10] else '',
-            'last_name': student[3],
-            'email': student[4] if student[4] else '',
-            'phone': student[5] if student[5] else '',
-            'course': student[6],
-            'department': student[11] if len(student) > 11 and student[11] else '',
-            'year_level': student[7] if student[7] else '',
-            'enrollment_date': student[8] if student[8] else '',
-            'status': student[9]
-        })
+    # An explicit threshold asks for similarity-ranked name matches; otherwise
+    # fall back to them only when the exact substring search finds nothing and
+    # the term has enough letters to compare. Fuzzy results are ranked by
+    # similarity, so sort_column/sort_direction do not apply, and the payload
+    # says match='fuzzy' so the client can tell.
+    if threshold is not None:
+        if not math.isfinite(threshold):
+            response = jsonify({'success': False, 'message': 'Threshold must be a number between 0.0 and 1.0.'})
+            response.status_code = 400
+            return response
+        students = db.fuzzy_search_student(search_term, threshold=min(max(threshold, 0.0), 1.0))
+        return students_response(students, page, per_page, match='fuzzy')
     
-    return jsonify({
-        'success': True,
-        'students': students_list,
-        'pagination': {
-            'page': page,
-            'per_page': per_page,
-            'total': total_records,
-            'total_pages': (total_records + per_page - 1) // per_page
-        }
-    })
+    students = db.search_student(search_term, sort_column=sort_column, sort_direction=sort_direction)
+    if not students and can_fuzzy_match(search_term):
+        students = db.fuzzy_search_student(search_term)
+        return students_response(students, page, per_page, match='fuzzy')
+    return students_response(students, page, per_page)
 
 
 @app.route('/api/students/add', methods=['POST'])
@@ -0,0 +1,73 @@
+import gzip
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/javascript',
+    'text/html',
+    'text/css',
+    'text/javascript',
+    'text/plain'
+}
+
+MIN_COMPRESS_SIZE = 1024
+
+# Static files are streamed from disk; only buffer ones small enough to compress in memory.
+MAX_BUFFERED_SIZE = 5 * 1024 * 1024
+
+
+def choose_encoding(accept_encodings):
+    """Pick the best encoding the client accepts, preferring brotli when installed."""
+    candidates = []
+    if brotli is not None:
+        candidates.append('br')
+    candidates.append('gzip')
+
+    best, best_quality = None, 0
+    for encoding in candidates:
+        quality = accept_encodings.quality(encoding)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress_response(response, accept_encodings, min_size=MIN_COMPRESS_SIZE):
+    # 206 range responses and 304s are left alone, as is anything already encoded.
+    if (response.status_code != 200
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+
+    encoding = choose_encoding(accept_encodings)
+    if encoding is None:
+        return response
+
+    if response.direct_passthrough:
+        if response.content_length is None or response.content_length > MAX_BUFFERED_SIZE:
+            return response
+        response.direct_passthrough = False
+
+    data = response.get_data()
+    if len(data) < min_size:
+        return response
+
+    if encoding == 'br':
+        data = brotli.compress(data, quality=5)
+    else:
+        data = gzip.compress(data, compresslevel=6)
+
+    response.set_data(data)
+    response.headers['Content-Encoding'] = encoding
+    # Byte ranges and a strong ETag describe the uncompressed file.
+    response.headers.pop('Accept-Ranges', None)
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
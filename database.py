@@ -1,27 +1,95 @@
-import sqlite3
 import hashlib
+import math
 from datetime import datetime
 import time
+from storage import SQLiteBackend, PoolExhausted
+from snapshot import RosterSnapshot
+from trigram import DEFAULT_THRESHOLD, name_trigrams, trigrams, similarity
+from validation import student_blocking_keys, duplicate_match_keys, check_duplicate_student
+
+
+SORT_COLUMNS = {
+    'id': ('id',),
+    'student_id': ('student_id',),
+    'name': ('last_name', 'first_name', 'middle_name'),
+    'course': ('course',),
+    'department': ('department',),
+    'year_level': ('year_level',),
+    'status': ('status',)
+}
+
+DEPARTMENT_ACRONYMS = {
+    'CICS': 'College of Informatics and Computing Sciences',
+    'COE': 'College of Engineering',
+    'CAFAD': 'College of Architecture, Fine Arts and Design',
+    'CET': 'College of Engineering Technology'
+}
+
+SEARCH_LIKE_COLUMNS = ('id', 'student_id', 'first_name', 'middle_name', 'last_name', 'email',
+                       'phone', 'course', 'department', 'year_level', 'status')
+
+
+def _build_student_queries():
+    # Every SQL text the student listing/search can issue, built once so each
+    # request reuses an identical string and hits the driver's statement cache.
+    queries = {}
+    for sort_column, columns in SORT_COLUMNS.items():
+        for direction in ('ASC', 'DESC'):
+            order_by = ', '.join(f'{column} {direction}' for column in columns)
+            if sort_column != 'id':
+                # Ties always come out oldest record first, in either direction.
+                order_by += ', id ASC'
+            queries[('list', sort_column, direction, False)] = f'SELECT * FROM students ORDER BY {order_by}'
+            for match_department in (False, True):
+                # LOWER on both sides keeps the match case-insensitive on
+                # PostgreSQL, whose LIKE is case-sensitive unlike SQLite's.
+                conditions = ['LOWER(CAST(id AS TEXT)) LIKE LOWER(?)' if column == 'id'
+                              else f'LOWER({column}) LIKE LOWER(?)'
+                              for column in SEARCH_LIKE_COLUMNS]
+                if match_department:
+                    conditions.append('department = ?')
+                where = '\n                    OR '.join(conditions)
+                queries[('search', sort_column, direction, match_department)] = f'''
+                    SELECT * FROM students 
+                    WHERE {where}
+                    ORDER BY {order_by}
+                '''
+    return queries
+
+
+STUDENT_QUERIES = _build_student_queries()
+
+
+def normalize_sort(sort_column='id', sort_direction='asc'):
+    if sort_column not in SORT_COLUMNS:
+        sort_column = 'id'
+    direction = 'ASC' if sort_direction.lower() == 'asc' else 'DESC'
+    return sort_column, direction
+
+
+def student_query(operation, sort_column='id', sort_direction='asc', match_department=False):
+    sort_column, direction = normalize_sort(sort_column, sort_direction)
+    return STUDENT_QUERIES[(operation, sort_column, direction, match_department)]
 
 
 class Database:
-    def __init__(self, db_name="enrollment_system.db"):
+    def __init__(self, db_name="enrollment_system.db", backend=None, snapshot=False):
         self.db_name = db_name
+        self.backend = backend or SQLiteBackend(db_name)
+        self.snapshot = None
         self.create_tables()
+        if snapshot:
+            self.load_snapshot()
 
     def get_connection(self):
-        conn = sqlite3.connect(self.db_name, timeout=30.0, check_same_thread=False)
-        conn.execute('PRAGMA journal_mode=WAL')
-        conn.execute('PRAGMA busy_timeout=30000')
-        conn.execute('PRAGMA synchronous=NORMAL')
-        return conn
+        return self.backend.connect()
     
     def execute_with_retry(self, operation, max_retries=3, retry_delay=0.1):
         for attempt in range(max_retries):
             try:
                 return operation()
-            except sqlite3.OperationalError as e:
-                if "locked" in str(e).lower() and attempt < max_retries - 1:
+            except self.backend.OperationalError as e:
+                if self.backend.is_retryable(e) and attempt < max_retries - 1:
                     time.sleep(retry_delay * (attempt + 1))
                     continue
                 raise
@@ -31,9 +99,9 @@ class Database:
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute('''
+        cursor.execute(f'''
             CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                id {self.backend.id_column},
                 username TEXT UNIQUE NOT NULL,
                 password TEXT NOT NULL,
                 first_name TEXT NOT NULL,
@@ -46,9 +114,9 @@ class Database:
             )
         ''')
         
-        cursor.execute('''
+        cursor.execute(f'''
             CREATE TABLE IF NOT EXISTS students (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                id {self.backend.id_column},
                 student_id TEXT UNIQUE NOT NULL,
                 first_name TEXT NOT NULL,
                 middle_name TEXT,
@@ -63,11 +131,141 @@ class Database:
             )
         ''')
         
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS student_name_trigrams (
+                trigram TEXT NOT NULL,
+                student_id TEXT NOT NULL,
+                PRIMARY KEY (trigram, student_id)
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_student_name_trigrams_student
+            ON student_name_trigrams (student_id)
+        ''')
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS student_blocking_keys (
+                block_key TEXT NOT NULL,
+                student_id TEXT NOT NULL,
+                PRIMARY KEY (block_key, student_id)
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_student_blocking_keys_student
+            ON student_blocking_keys (student_id)
+        ''')
+        
         conn.commit()
+        
+        cursor.execute('SELECT 1 FROM student_name_trigrams LIMIT 1')
+        name_index_empty = cursor.fetchone() is None
+        cursor.execute('SELECT 1 FROM student_blocking_keys LIMIT 1')
+        blocking_index_empty = cursor.fetchone() is None
         conn.close()
         
+        if name_index_empty:
+            self.rebuild_name_index()
+        if blocking_index_empty:
+            self.rebuild_blocking_index()
+        
         self.create_default_admin()
     
+    def index_student_names(self, cursor, student_id, first_name, middle_name, last_name):
+        cursor.execute('DELETE FROM student_name_trigrams WHERE student_id = ?', (student_id,))
+        cursor.executemany(
+            'INSERT INTO student_name_trigrams (trigram, student_id) VALUES (?, ?)',
+            [(gram, student_id) for gram in name_trigrams(first_name, middle_name, last_name)]
+        )
+    
+    def rebuild_name_index(self):
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT student_id, first_name, middle_name, last_name FROM students')
+        students = cursor.fetchall()
+        
+        cursor.execute('DELETE FROM student_name_trigrams')
+        for student in students:
+            self.index_student_names(cursor, *student)
+        
+        conn.commit()
+        conn.close()
+    
+    def index_student_blocking_keys(self, cursor, student_id, student_data):
+        cursor.execute('DELETE FROM student_blocking_keys WHERE student_id = ?', (student_id,))
+        cursor.executemany(
+            'INSERT INTO student_blocking_keys (block_key, student_id) VALUES (?, ?)',
+            [(key, student_id) for key in student_blocking_keys(student_data)]
+        )
+    
+    def rebuild_blocking_index(self):
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('DELETE FROM student_blocking_keys')
+        for student in self.get_students_for_matching(cursor):
+            self.index_student_blocking_keys(cursor, student['student_id'], student)
+        
+        conn.commit()
+        conn.close()
+    
+    def get_students_for_matching(self, cursor, student_ids=None):
+        query = 'SELECT student_id, first_name, middle_name, last_name, email, phone FROM students'
+        params = ()
+        if student_ids is not None:
+            if not student_ids:
+                return []
+            query += f" WHERE student_id IN ({', '.join('?' * len(student_ids))})"
+            params = tuple(student_ids)
+        
+        cursor.execute(query, params)
+        fields = ('student_id', 'first_name', 'middle_name', 'last_name', 'email', 'phone')
+        return [dict(zip(fields, student)) for student in cursor.fetchall()]
+    
+    def find_duplicate_student(self, cursor, student_data, exclude_student_id=None):
+        keys = student_blocking_keys(student_data)
+        if not keys:
+            return {'valid': True, 'message': 'No duplicate found'}
+        
+        cursor.execute(f'''
+            SELECT DISTINCT student_id FROM student_blocking_keys
+            WHERE block_key IN ({', '.join('?' * len(keys))}) AND student_id != ?
+        ''', (*keys, exclude_student_id or ''))
+        candidate_ids = [row[0] for row in cursor.fetchall()]
+        
+        return check_duplicate_student(student_data, self.get_students_for_matching(cursor, candidate_ids))
+    
+    def find_duplicate_clusters(self):
+        # Union-find over shared match keys, so no pair of records is compared directly.
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        students = self.get_students_for_matching(cursor)
+        conn.close()
+        
+        parent = {}
+        
+        def find(student_id):
+            while parent[student_id] != student_id:
+                parent[student_id] = parent[parent[student_id]]
+                student_id = parent[student_id]
+            return student_id
+        
+        first_seen = {}
+        for student in students:
+            student_id = student['student_id']
+            parent[student_id] = student_id
+            for key in duplicate_match_keys(student):
+                if key in first_seen:
+                    parent[find(student_id)] = find(first_seen[key])
+                else:
+                    first_seen[key] = student_id
+        
+        clusters = {}
+        for student_id in parent:
+            clusters.setdefault(find(student_id), []).append(student_id)
+        
+        return sorted(sorted(cluster) for cluster in clusters.values() if len(cluster) > 1)
+    
     def hash_password(self, password):
         return hashlib.sha256(password.encode()).hexdigest()
     
@@ -181,7 +379,7 @@ class Database:
                 conn.commit()
                 return {'success': True, 'message': 'User created successfully'}
             
-            except sqlite3.IntegrityError:
+            except self.backend.IntegrityError:
                 return {'success': False, 'message': 'Username already exists'}
             except Exception as e:
                 return {'success': False, 'message': f'Error: {str(e)}'}
@@ -201,6 +399,10 @@ class Database:
                 conn = self.get_connection()
                 cursor = conn.cursor()
                 
+                duplicate_check = self.find_duplicate_student(cursor, student_data)
+                if not duplicate_check['valid']:
+                    return {'success': False, 'message': duplicate_check['message']}
+                
                 cursor.execute('''
                     INSERT INTO students (student_id, first_name, middle_name, last_name, email, phone, course, department, year_level, status)
                     VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
@@ -216,11 +418,14 @@ class Database:
                     student_data['year_level'],
                     student_data.get('status', 'Active')
                 ))
+                self.index_student_names(cursor, student_data['student_id'], student_data['first_name'],
+                                         student_data.get('middle_name', ''), student_data['last_name'])
+                self.index_student_blocking_keys(cursor, student_data['student_id'], student_data)
                 
                 conn.commit()
                 return {'success': True, 'message': 'Student added successfully'}
             
-            except sqlite3.IntegrityError:
+            except self.backend.IntegrityError:
                 return {'success': False, 'message': 'Student ID already exists'}
             except Exception as e:
                 return {'success': False, 'message': f'Error: {str(e)}'}
@@ -229,119 +434,135 @@ class Database:
                     conn.close()
         
         try:
-            return self.execute_with_retry(_add_operation)
+            result = self.execute_with_retry(_add_operation)
+            if result and result['success']:
+                self.refresh_snapshot_student(student_data['student_id'])
+            return result
         except Exception as e:
             return {'success': False, 'message': f'Database error: {str(e)}'}
     
+    def load_snapshot(self):
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM students')
+        columns = [description[0] for description in cursor.description]
+        self.snapshot = RosterSnapshot(columns, cursor.fetchall(), SORT_COLUMNS)
+        conn.close()
+    
+    def refresh_snapshot_student(self, student_id):
+        if self.snapshot is None:
+            return
+        def _fetch_student():
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            cursor.execute('SELECT * FROM students WHERE student_id = ?', (student_id,))
+            student = cursor.fetchone()
+            conn.close()
+            return student
+        
+        try:
+            self.snapshot.refresh(student_id, _fetch_student)
+        except Exception as e:
+            # A snapshot we cannot patch is a stale one; fall back to the database.
+            print(f"Error refreshing roster snapshot: {e}")
+            self.snapshot = None
+    
     def get_all_students(self, sort_column='id', sort_direction='asc'):
+        if self.snapshot is not None:
+            return self.snapshot.select(*normalize_sort(sort_column, sort_direction))
+        
         try:
             conn = self.get_connection()
             cursor = conn.cursor()
             
-            direction = 'ASC' if sort_direction.lower() == 'asc' else 'DESC'
-            
-            valid_columns = {
-                'id': f'id {direction}',
-                'student_id': f'student_id {direction}',
-                'name': f'last_name {direction}, first_name {direction}, middle_name {direction}',
-                'course': f'course {direction}',
-                'department': f'department {direction}',
-                'year_level': f'year_level {direction}',
-                'status': f'status {direction}'
-            }
-            
-            order_by = valid_columns.get(sort_column, f'id {direction}')
-            
-            query = f'SELECT * FROM students ORDER BY {order_by}'
-            cursor.execute(query)
+            cursor.execute(student_query('list', sort_column, sort_direction))
             students = cursor.fetchall()
             
             conn.close()
             return students
         
+        except PoolExhausted:
+            # Not an empty roster: let the caller report that the server is busy.
+            raise
         except Exception as e:
             print(f"Error retrieving students: {e}")
             return []
     
     def search_student(self, search_term, sort_column='id', sort_direction='asc'):
+        dept_full_name = DEPARTMENT_ACRONYMS.get(search_term.upper(), None)
+        
+        if self.snapshot is not None and self.snapshot.can_search(search_term):
+            return self.snapshot.search(search_term, SEARCH_LIKE_COLUMNS,
+                                        *normalize_sort(sort_column, sort_direction),
+                                        department=dept_full_name)
+        
         try:
             conn = self.get_connection()
             cursor = conn.cursor()
             
-            direction = 'ASC' if sort_direction.lower() == 'asc' else 'DESC'
-            
-            valid_columns = {
-                'id': f'id {direction}',
-                'student_id': f'student_id {direction}',
-                'name': f'last_name {direction}, first_name {direction}, middle_name {direction}',
-                'course': f'course {direction}',
-                'department': f'department {direction}',
-                'year_level': f'year_level {direction}',
-                'status': f'status {direction}'
-            }
+            search_pattern = f"%{search_term}%"
             
-            order_by = valid_columns.get(sort_column, f'id {direction}')
+            query = student_query('search', sort_column, sort_direction, dept_full_name is not None)
+            params = [search_pattern] * len(SEARCH_LIKE_COLUMNS)
+            if dept_full_name:
+                params.append(dept_full_name)
             
-            search_pattern = f"%{search_term}%"
+            cursor.execute(query, params)
+            students = cursor.fetchall()
+            conn.close()
+            return students
+        
+        except PoolExhausted:
+            # Not an empty roster: let the caller report that the server is busy.
+            raise
+        except Exception as e:
+            print(f"Error searching students: {e}")
+            return []
+    
+    def fuzzy_search_student(self, search_term, threshold=DEFAULT_THRESHOLD):
+        # Ranked by similarity, then id; there is no sort column.
+        try:
+            query_grams = sorted(trigrams(search_term))
+            if not query_grams:
+                return []
+            # Jaccard >= threshold implies at least this many shared trigrams.
+            min_shared = max(1, math.ceil(threshold * len(query_grams)))
             
-            department_search = search_term.upper()
-            dept_mapping = {
-                'CICS': 'College of Informatics and Computing Sciences',
-                'COE': 'College of Engineering',
-                'CAFAD': 'College of Architecture, Fine Arts and Design',
-                'CET': 'College of Engineering Technology'
-            }
+            conn = self.get_connection()
+            cursor = conn.cursor()
             
-            dept_full_name = dept_mapping.get(department_search, None)
+            placeholders = ', '.join('?' * len(query_grams))
+            cursor.execute(f'''
+                SELECT t.student_id, COUNT(*) AS shared,
+                       (SELECT COUNT(*) FROM student_name_trigrams n WHERE n.student_id = t.student_id) AS total
+                FROM student_name_trigrams t
+                WHERE t.trigram IN ({placeholders})
+                GROUP BY t.student_id
+                HAVING COUNT(*) >= ?
+            ''', (*query_grams, min_shared))
+            scores = {}
+            for student_id, shared, total in cursor.fetchall():
+                score = similarity(len(query_grams), total, shared)
+                if score >= threshold:
+                    scores[student_id] = score
             
-            if dept_full_name:
-                query = f'''
-                    SELECT * FROM students 
-                    WHERE CAST(id AS TEXT) LIKE ?
-                    OR student_id LIKE ? 
-                    OR first_name LIKE ? 
-                    OR middle_name LIKE ?
-                    OR last_name LIKE ? 
-                    OR email LIKE ?
-                    OR phone LIKE ?
-                    OR course LIKE ?
-                    OR department LIKE ?
-                    OR department = ?
-                    OR year_level LIKE ?
-                    OR status LIKE ?
-                    ORDER BY {order_by}
-                '''
-                
-                cursor.execute(query, (search_pattern, search_pattern, search_pattern, search_pattern, 
-                                       search_pattern, search_pattern, search_pattern, search_pattern,
-                                       search_pattern, dept_full_name, search_pattern, search_pattern))
-            else:
-                query = f'''
-                    SELECT * FROM students 
-                    WHERE CAST(id AS TEXT) LIKE ?
-                    OR student_id LIKE ? 
-                    OR first_name LIKE ? 
-                    OR middle_name LIKE ?
-                    OR last_name LIKE ? 
-                    OR email LIKE ?
-                    OR phone LIKE ?
-                    OR course LIKE ?
-                    OR department LIKE ?
-                    OR year_level LIKE ?
-                    OR status LIKE ?
-                    ORDER BY {order_by}
-                '''
-                
-                cursor.execute(query, (search_pattern, search_pattern, search_pattern, search_pattern, 
-                                       search_pattern, search_pattern, search_pattern, search_pattern,
-                                       search_pattern, search_pattern, search_pattern))
+            if not scores:
+                conn.close()
+                return []
             
+            placeholders = ', '.join('?' * len(scores))
+            cursor.execute(f'SELECT * FROM students WHERE student_id IN ({placeholders})', tuple(scores))
             students = cursor.fetchall()
             conn.close()
+            
+            students.sort(key=lambda student: (-scores[student[1]], student[0]))
             return students
         
+        except PoolExhausted:
+            # Not an empty roster: let the caller report that the server is busy.
+            raise
         except Exception as e:
-            print(f"Error searching students: {e}")
+            print(f"Error fuzzy searching students: {e}")
             return []
     
     def update_student(self, student_id, student_data):
@@ -351,6 +572,14 @@ class Database:
                 conn = self.get_connection()
                 cursor = conn.cursor()
                 
+                # Only re-check when name, email or phone change, so records that
+                # already match each other can still be edited and cleaned up.
+                stored = self.get_students_for_matching(cursor, [student_id])
+                if stored and duplicate_match_keys(stored[0]) != duplicate_match_keys(student_data):
+                    duplicate_check = self.find_duplicate_student(cursor, student_data, exclude_student_id=student_id)
+                    if not duplicate_check['valid']:
+                        return {'success': False, 'message': duplicate_check['message']}
+                
                 cursor.execute('''
                     UPDATE students 
                     SET first_name = ?, middle_name = ?, last_name = ?, email = ?, phone = ?, 
@@ -368,9 +597,14 @@ class Database:
                     student_data['status'],
                     student_id
                 ))
+                affected_rows = cursor.rowcount
+                
+                if affected_rows > 0:
+                    self.index_student_names(cursor, student_id, student_data['first_name'],
+                                             student_data.get('middle_name', ''), student_data['last_name'])
+                    self.index_student_blocking_keys(cursor, student_id, student_data)
                 
                 conn.commit()
-                affected_rows = cursor.rowcount
                 
                 if affected_rows > 0:
                     return {'success': True, 'message': 'Student updated successfully'}
@@ -384,7 +618,10 @@ class Database:
                     conn.close()
         
         try:
-            return self.execute_with_retry(_update_operation)
+            result = self.execute_with_retry(_update_operation)
+            if result and result['success']:
+                self.refresh_snapshot_student(student_id)
+            return result
         except Exception as e:
             return {'success': False, 'message': f'Database error: {str(e)}'}
     
@@ -396,9 +633,11 @@ class Database:
                 cursor = conn.cursor()
                 
                 cursor.execute('DELETE FROM students WHERE student_id = ?', (student_id,))
+                affected_rows = cursor.rowcount
+                cursor.execute('DELETE FROM student_name_trigrams WHERE student_id = ?', (student_id,))
+                cursor.execute('DELETE FROM student_blocking_keys WHERE student_id = ?', (student_id,))
                 
                 conn.commit()
-                affected_rows = cursor.rowcount
                 
                 if affected_rows > 0:
                     return {'success': True, 'message': 'Student deleted successfully'}
@@ -412,6 +651,9 @@ class Database:
                     conn.close()
         
         try:
-            return self.execute_with_retry(_delete_operation)
+            result = self.execute_with_retry(_delete_operation)
+            if result and result['success']:
+                self.refresh_snapshot_student(student_id)
+            return result
         except Exception as e:
             return {'success': False, 'message': f'Database error: {str(e)}'}
@@ -0,0 +1,19 @@
+import sys
+from database import Database
+
+
+def main(db_name="enrollment_system.db"):
+    db = Database(db_name)
+    clusters = db.find_duplicate_clusters()
+    
+    if not clusters:
+        print("No probable duplicate student records found.")
+        return
+    
+    print(f"Found {len(clusters)} group(s) of probable duplicate student records:")
+    for cluster in clusters:
+        print(f"  - {', '.join(cluster)}")
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:2])
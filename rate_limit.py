@@ -0,0 +1,124 @@
+import math
+import sqlite3
+import threading
+import time
+
+
+def refill(tokens, updated, now, capacity, rate):
+    return min(capacity, tokens + (now - updated) * rate)
+
+
+def take_token(tokens, capacity, rate):
+    """Return (allowed, tokens_left, retry_after_seconds) for one request."""
+    if tokens >= 1:
+        return True, tokens - 1, 0
+    return False, tokens, (1 - tokens) / rate
+
+
+class MemoryBucketStore:
+    """Token buckets kept in this process only."""
+
+    PRUNE_EVERY = 1000
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._calls = 0
+
+    def take(self, key, capacity, rate, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, updated, _ = self._buckets.get(key, (capacity, now, now))
+            allowed, tokens, retry_after = take_token(refill(tokens, updated, now, capacity, rate), capacity, rate)
+            self._buckets[key] = (tokens, now, now + (capacity - tokens) / rate)
+
+            self._calls += 1
+            if self._calls % self.PRUNE_EVERY == 0:
+                self._prune(now)
+            return allowed, retry_after
+
+    def _prune(self, now):
+        # A bucket that has refilled completely is the same as no bucket.
+        for key, (_, _, full_at) in list(self._buckets.items()):
+            if full_at <= now:
+                del self._buckets[key]
+
+
+class SQLiteBucketStore:
+    """Token buckets in a SQLite table shared by every worker on the host.
+
+    If the table is busy for longer than lock_timeout the request is checked
+    against a per-process bucket instead, so a contended limiter store never
+    stalls the requests it is meant to protect.
+    """
+
+    PRUNE_EVERY = 1000
+    PRUNE_AFTER = 24 * 60 * 60
+
+    def __init__(self, db_name, lock_timeout=0.05):
+        self.db_name = db_name
+        self.lock_timeout = lock_timeout
+        self.fallback = MemoryBucketStore()
+        self._local = threading.local()
+        self._calls = 0
+        conn = self._connection()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+                bucket_key TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated REAL NOT NULL
+            )
+        ''')
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_name, timeout=self.lock_timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def take(self, key, capacity, rate, now=None):
+        # Wall-clock time, since monotonic clocks are not comparable across processes.
+        now = time.time() if now is None else now
+        try:
+            conn = self._connection()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = conn.execute('SELECT tokens, updated FROM rate_limit_buckets WHERE bucket_key = ?',
+                                   (key,)).fetchone()
+                tokens, updated = row if row else (capacity, now)
+                allowed, tokens, retry_after = take_token(refill(tokens, updated, now, capacity, rate),
+                                                          capacity, rate)
+                conn.execute('INSERT OR REPLACE INTO rate_limit_buckets (bucket_key, tokens, updated) VALUES (?, ?, ?)',
+                             (key, tokens, now))
+                self._calls += 1
+                if self._calls % self.PRUNE_EVERY == 0:
+                    conn.execute('DELETE FROM rate_limit_buckets WHERE updated < ?', (now - self.PRUNE_AFTER,))
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+            return allowed, retry_after
+        except sqlite3.OperationalError:
+            return self.fallback.take(key, capacity, rate)
+
+
+class RateLimiter:
+    """Named rules of the form (burst, period_seconds) applied per caller key.
+
+    A rule of (5, 60) allows a burst of 5 requests and then one more every
+    12 seconds.
+    """
+
+    def __init__(self, rules, store=None):
+        self.rules = dict(rules)
+        self.store = store or MemoryBucketStore()
+
+    def hit(self, rule, caller):
+        """Return 0 if the request may proceed, else whole seconds until it may."""
+        capacity, period = self.rules[rule]
+        allowed, retry_after = self.store.take(f'{rule}:{caller}', capacity, capacity / period)
+        if allowed:
+            return 0
+        return max(1, math.ceil(retry_after))
@@ -0,0 +1,214 @@
+import sys
+import threading
+from array import array
+
+
+class CodeTable:
+    """Maps each distinct string of a low-cardinality column to a small int."""
+
+    __slots__ = ('values', 'codes')
+
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+
+    def code(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(sys.intern(value) if isinstance(value, str) else value)
+            self.codes[value] = code
+        return code
+
+
+class RosterSnapshot:
+    """Columnar in-memory copy of the students table.
+
+    Text columns with few distinct values (course, department, year_level,
+    status) are stored as array('H') codes into a shared CodeTable; the rest
+    are plain lists indexed by slot. Each sortable column keeps a permutation
+    of live slots in ascending order with id breaking ties. The descending
+    order is derived from it once per write and cached; tied rows stay in
+    ascending id order in both directions, as in the SQL ORDER BY.
+
+    Rows are returned as tuples in the same column order as SELECT *.
+    The snapshot only sees writes made through the Database that owns it, so
+    it is meant for a single app process serving mostly reads.
+    """
+
+    CODED_COLUMNS = ('course', 'department', 'year_level', 'status')
+
+    def __init__(self, columns, rows, sort_columns):
+        self.columns = tuple(columns)
+        self.sort_columns = sort_columns
+        self._lock = threading.RLock()
+        self._code_tables = {name: CodeTable() for name in self.CODED_COLUMNS if name in self.columns}
+        self._data = {}
+        for name in self.columns:
+            if name == 'id':
+                self._data[name] = array('q')
+            elif name in self._code_tables:
+                self._data[name] = array('H')
+            else:
+                self._data[name] = []
+        self._live = bytearray()
+        self._free = []
+        self._slot_of = {}
+        self._indexes = {}
+        self._descending = {}
+
+        for row in rows:
+            self._store(row)
+        for sort_column in sort_columns:
+            key = self._sort_key(sort_column)
+            self._indexes[sort_column] = sorted(self._slot_of.values(), key=key)
+
+    def __len__(self):
+        return len(self._slot_of)
+
+    def _value(self, name, slot):
+        value = self._data[name][slot]
+        if name in self._code_tables:
+            return self._code_tables[name].values[value]
+        return value
+
+    def _row(self, slot):
+        return tuple(self._value(name, slot) for name in self.columns)
+
+    def _sort_key(self, sort_column):
+        names = self.sort_columns[sort_column]
+
+        # NULLs sort first, as they do in SQLite; id breaks ties so every
+        # slot has a unique position in the permutation.
+        def key(slot):
+            parts = []
+            for name in names:
+                value = self._value(name, slot)
+                parts.append((value is not None, value if value is not None else ''))
+            parts.append(self._data['id'][slot])
+            return parts
+
+        return key
+
+    def _position(self, index, slot, key):
+        target = key(slot)
+        low, high = 0, len(index)
+        while low < high:
+            middle = (low + high) // 2
+            if key(index[middle]) < target:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _store(self, row, slot=None):
+        if slot is None:
+            slot = self._free.pop() if self._free else len(self._live)
+        appending = slot == len(self._live)
+        for name, value in zip(self.columns, row):
+            if name in self._code_tables:
+                value = self._code_tables[name].code(value)
+            elif name == 'id':
+                value = int(value)
+            if appending:
+                self._data[name].append(value)
+            else:
+                self._data[name][slot] = value
+        if appending:
+            self._live.append(1)
+        else:
+            self._live[slot] = 1
+        self._slot_of[self._value('student_id', slot)] = slot
+        return slot
+
+    def _unindex(self, slot):
+        for sort_column, index in self._indexes.items():
+            del index[self._position(index, slot, self._sort_key(sort_column))]
+
+    def _index(self, slot):
+        for sort_column, index in self._indexes.items():
+            index.insert(self._position(index, slot, self._sort_key(sort_column)), slot)
+
+    def _ordered(self, sort_column, direction):
+        index = self._indexes[sort_column]
+        if direction == 'ASC':
+            return index
+        if sort_column not in self._descending:
+            # Reverse the tie groups but not the slots inside each group.
+            names = self.sort_columns[sort_column]
+            ordered, group, group_key = [], [], None
+            for slot in reversed(index):
+                key = tuple(self._value(name, slot) for name in names)
+                if group and key != group_key:
+                    ordered.extend(reversed(group))
+                    group = []
+                group_key = key
+                group.append(slot)
+            ordered.extend(reversed(group))
+            self._descending[sort_column] = ordered
+        return self._descending[sort_column]
+
+    def refresh(self, student_id, fetch_row):
+        """Re-read one student with fetch_row() and patch it in, or drop it if gone.
+
+        The read happens under the snapshot lock so concurrent writers to
+        the same student cannot apply their re-reads out of order.
+        """
+        with self._lock:
+            row = fetch_row()
+            if row:
+                self.upsert(row)
+            else:
+                self.remove(student_id)
+
+    def upsert(self, row):
+        with self._lock:
+            self._descending.clear()
+            student_id = row[self.columns.index('student_id')]
+            slot = self._slot_of.get(student_id)
+            if slot is not None:
+                self._unindex(slot)
+            self._index(self._store(row, slot))
+
+    def remove(self, student_id):
+        with self._lock:
+            self._descending.clear()
+            slot = self._slot_of.pop(student_id, None)
+            if slot is None:
+                return
+            self._unindex(slot)
+            self._live[slot] = 0
+            self._free.append(slot)
+
+    def select(self, sort_column, direction):
+        with self._lock:
+            return [self._row(slot) for slot in self._ordered(sort_column, direction)]
+
+    @staticmethod
+    def can_search(search_term):
+        # LIKE wildcards and non-ASCII case folding differ from a plain
+        # substring test; leave those terms to the database.
+        return search_term.isascii() and '%' not in search_term and '_' not in search_term
+
+    def search(self, search_term, like_columns, sort_column, direction, department=None):
+        needle = search_term.lower()
+        with self._lock:
+            # Coded columns only need each distinct value tested once.
+            coded_hits = {}
+            for name, table in self._code_tables.items():
+                coded_hits[name] = [value is not None and (needle in str(value).lower() or
+                                                           (name == 'department' and value == department))
+                                    for value in table.values]
+
+            def matches(slot):
+                for name in like_columns:
+                    if name in coded_hits:
+                        if coded_hits[name][self._data[name][slot]]:
+                            return True
+                    else:
+                        value = self._data[name][slot]
+                        if value is not None and needle in str(value).lower():
+                            return True
+                return False
+
+            return [self._row(slot) for slot in self._ordered(sort_column, direction) if matches(slot)]
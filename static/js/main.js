@@ -59,9 +59,15 @@ function checkAdminRole() {
     return true;
 }
 
+function studentsFromResponse(data) {
+    // format=compact responses list the field names once and each student as an array
+    return data.rows.map(row => Object.fromEntries(data.columns.map((column, i) => [column, row[i]])));
+}
+
 async function loadStudents() {
     try {
         const url = new URL('/api/students', window.location.origin);
+        url.searchParams.append('format', 'compact');
         url.searchParams.append('page', currentPage);
         url.searchParams.append('per_page', pageSize);
         
@@ -79,7 +85,7 @@ async function loadStudents() {
         const data = await response.json();
         
         if (data.success) {
-            currentStudents = data.students;
+            currentStudents = studentsFromResponse(data);
             totalRecords = data.pagination.total;
             totalPages = data.pagination.total_pages;
             currentPage = data.pagination.page;
@@ -556,6 +562,7 @@ async function searchStudents() {
         try {
             const url = new URL('/api/students/search', window.location.origin);
             url.searchParams.append('query', searchTerm);
+            url.searchParams.append('format', 'compact');
             
             if (currentSortColumn) {
                 url.searchParams.append('sort_column', currentSortColumn);
@@ -566,13 +573,19 @@ async function searchStudents() {
             const data = await response.json();
             
             if (data.success) {
-                currentStudents = data.students;
+                currentStudents = studentsFromResponse(data);
                 totalRecords = currentStudents.length;
                 totalPages = 1;
                 currentPage = 1;
                 displayStudents(currentStudents);
                 updateRecordCount(currentStudents.length, true);
                 renderPagination();
+                
+                if (data.match === 'fuzzy' && currentStudents.length) {
+                    showAlert('No exact matches. Showing students with similar names.', 'info');
+                }
+            } else if (data.message) {
+                showAlert(data.message, 'error');
             }
         } catch (error) {
             console.error('Error searching students:', error);
@@ -0,0 +1,298 @@
+import sqlite3
+import queue
+import importlib
+import threading
+import time
+
+
+class PoolExhausted(Exception):
+    pass
+
+
+class StorageBackend:
+    """Connection and dialect layer used by Database.
+
+    Database keeps all of the CRUD, search and auth SQL; a backend only
+    decides how connections are opened and released, which placeholder
+    style the driver expects and which driver errors mean "duplicate key"
+    or "try again".
+    """
+
+    driver = None
+    id_column = 'INTEGER PRIMARY KEY AUTOINCREMENT'
+
+    @property
+    def IntegrityError(self):
+        return self.driver.IntegrityError
+
+    @property
+    def OperationalError(self):
+        return self.driver.OperationalError
+
+    def connect(self):
+        raise NotImplementedError
+
+    def is_retryable(self, error):
+        message = str(error).lower()
+        return 'locked' in message or 'deadlock' in message or 'serializ' in message
+
+
+class PooledCursor:
+    def __init__(self, cursor, translate):
+        self._cursor = cursor
+        self._translate = translate
+
+    def execute(self, query, params=None):
+        # Without params the driver must not see a params argument at all,
+        # or format-style drivers %-interpolate the SQL anyway.
+        if params is None:
+            self._cursor.execute(query)
+        else:
+            self._cursor.execute(self._translate(query), params)
+        return self
+
+    def executemany(self, query, seq_of_params):
+        self._cursor.executemany(self._translate(query), seq_of_params)
+        return self
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+
+class PooledConnection:
+    """Borrowed connection whose close() hands it back to the pool."""
+
+    def __init__(self, pool, conn, opened_at, overflow=False):
+        self._pool = pool
+        self._conn = conn
+        self._opened_at = opened_at
+        self._overflow = overflow
+
+    def cursor(self):
+        return PooledCursor(self._conn.cursor(), self._pool.translate)
+
+    def execute(self, query, params=None):
+        return self.cursor().execute(query, params)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        if self._conn is None:
+            return
+        conn, self._conn = self._conn, None
+        if self._overflow:
+            self._pool.release_overflow()
+            conn.close()
+        else:
+            self._pool.release(conn, self._opened_at)
+
+    def __del__(self):
+        # A caller that bails out before close() must not leak the pool slot.
+        self.close()
+
+
+class ConnectionPool:
+    """Keeps up to size idle connections for reuse.
+
+    When all of them are borrowed, up to max_overflow extra connections
+    (None for no limit) are opened and closed again after use. Past that,
+    callers wait up to timeout seconds and then get PoolExhausted.
+
+    Idle connections older than max_age seconds, or failing ping(conn),
+    are discarded on checkout instead of being handed out.
+    """
+
+    def __init__(self, factory, size=5, timeout=30.0, translate=None, max_overflow=None, max_age=None, ping=None):
+        self.factory = factory
+        self.size = size
+        self.timeout = timeout
+        self.max_overflow = max_overflow
+        self.max_age = max_age
+        self.ping = ping
+        self._overflow = 0
+        self.translate = translate or (lambda query: query)
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _usable(self, conn, opened_at):
+        if self.max_age is not None and time.monotonic() - opened_at > self.max_age:
+            return False
+        return self.ping is None or self.ping(conn)
+
+    def _discard(self, conn):
+        with self._lock:
+            self._created -= 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _open(self):
+        return self.factory(), time.monotonic()
+
+    def acquire(self):
+        while True:
+            try:
+                conn, opened_at = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if self._usable(conn, opened_at):
+                return PooledConnection(self, conn, opened_at)
+            self._discard(conn)
+
+        with self._lock:
+            can_create = self._created < self.size
+            if can_create:
+                self._created += 1
+        if not can_create:
+            return self._acquire_overflow()
+        try:
+            return PooledConnection(self, *self._open())
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    def _acquire_overflow(self):
+        with self._lock:
+            can_overflow = self.max_overflow is None or self._overflow < self.max_overflow
+            if can_overflow:
+                self._overflow += 1
+        if can_overflow:
+            try:
+                return PooledConnection(self, *self._open(), overflow=True)
+            except Exception:
+                with self._lock:
+                    self._overflow -= 1
+                raise
+
+        try:
+            conn, opened_at = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise PoolExhausted(f'No database connection became free within {self.timeout} seconds') from None
+        if self._usable(conn, opened_at):
+            return PooledConnection(self, conn, opened_at)
+        # Discarding it freed a pool slot; open a fresh connection in its place.
+        self._discard(conn)
+        return self.acquire()
+
+    def release_overflow(self):
+        with self._lock:
+            self._overflow -= 1
+
+    def release(self, conn, opened_at):
+        try:
+            conn.rollback()
+        except Exception:
+            # Broken connection: drop it and let the pool open a fresh one.
+            self._discard(conn)
+            return
+        self._idle.put((conn, opened_at))
+
+    def close_all(self):
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+
+class SQLiteBackend(StorageBackend):
+    """Default backend: a local SQLite file.
+
+    Connections are kept in a small pool so the prepared statements held in
+    each connection's statement cache survive from one request to the next.
+    """
+
+    driver = sqlite3
+
+    def __init__(self, db_name="enrollment_system.db", pool_size=5, cached_statements=256):
+        self.db_name = db_name
+        self.cached_statements = cached_statements
+        # Requests beyond pool_size get their own short-lived connection, as
+        # every request did before pooling, rather than queueing.
+        self.pool = ConnectionPool(self._open, size=pool_size)
+
+    def _open(self):
+        conn = sqlite3.connect(self.db_name, timeout=30.0, check_same_thread=False,
+                               cached_statements=self.cached_statements)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA busy_timeout=30000')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def connect(self):
+        return self.pool.acquire()
+
+
+class DBAPIBackend(StorageBackend):
+    """PostgreSQL server reached through a DB-API 2.0 driver such as psycopg2.
+
+    The driver can be a module or its import name, e.g.
+    DBAPIBackend('psycopg2', 'dbname=enrollment host=db.internal').
+    Connections are pooled so every request does not pay a network
+    handshake; max_overflow caps the extra connections opened under load so
+    the server's connection limit is respected. Idle connections are pinged
+    before reuse and recycled after pool_recycle seconds, so ones dropped by
+    the server's idle timeout never reach a request.
+
+    The SQL in Database uses qmark placeholders, which are rewritten for
+    drivers using the format/pyformat style. Its DDL (TEXT UNIQUE) and
+    CAST(id AS TEXT) are valid on PostgreSQL and SQLite only; MySQL is not
+    supported.
+
+    DBAPIBackend.sqlite_stand_in('enrollment_test.db') gives a local
+    stand-in for exercising the pooled code path without a server.
+    """
+
+    id_column = 'SERIAL PRIMARY KEY'
+
+    def __init__(self, driver, *connect_args, pool_size=5, max_overflow=10, pool_timeout=30.0, pool_recycle=1800,
+                 pre_ping=True, id_column=None, **connect_kwargs):
+        if isinstance(driver, str):
+            driver = importlib.import_module(driver)
+        self.driver = driver
+        if id_column:
+            self.id_column = id_column
+        self.connect_args = connect_args
+        self.connect_kwargs = connect_kwargs
+        self.pool = ConnectionPool(self._open, size=pool_size, timeout=pool_timeout, translate=self._translate,
+                                   max_overflow=max_overflow, max_age=pool_recycle,
+                                   ping=self._ping if pre_ping else None)
+
+    @classmethod
+    def sqlite_stand_in(cls, db_name, **kwargs):
+        # Pooled connections move between request threads, so sqlite3's
+        # same-thread check has to be off, and SQLite has no SERIAL type.
+        return cls(sqlite3, db_name, check_same_thread=False,
+                   id_column=StorageBackend.id_column, **kwargs)
+
+    def _open(self):
+        return self.driver.connect(*self.connect_args, **self.connect_kwargs)
+
+    def _ping(self, conn):
+        try:
+            cursor = conn.cursor()
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _translate(self, query):
+        if getattr(self.driver, 'paramstyle', 'qmark') in ('format', 'pyformat'):
+            return query.replace('%', '%%').replace('?', '%s')
+        return query
+
+    def connect(self):
+        return self.pool.acquire()
@@ -0,0 +1,104 @@
+import os
+import tempfile
+import unittest
+
+from database import Database
+from validation import check_duplicate_student
+
+
+def student(student_id, first_name, last_name, email='', phone=''):
+    return {
+        'student_id': student_id,
+        'first_name': first_name,
+        'middle_name': '',
+        'last_name': last_name,
+        'email': email,
+        'phone': phone,
+        'course': 'BS Computer Science',
+        'department': 'College of Informatics and Computing Sciences',
+        'year_level': '1st Year',
+        'status': 'Enrolled'
+    }
+
+
+class CheckDuplicateStudentTest(unittest.TestCase):
+    existing = student('25-00001', 'Juan', 'Dela Cruz', 'juan.delacruz@example.com', '0912-345-6789')
+
+    def assert_duplicate(self, data, expected=True):
+        result = check_duplicate_student(data, [self.existing])
+        self.assertEqual(result['valid'], not expected, result['message'])
+        if expected:
+            self.assertIn('25-00001', result['message'])
+
+    def test_same_name_and_email(self):
+        self.assert_duplicate(student('25-00002', 'JUAN', 'De la Cruz', ' Juan.DelaCruz@Example.com '))
+
+    def test_same_name_and_phone(self):
+        self.assert_duplicate(student('25-00002', 'Juan', 'Dela Cruz', phone='0912 345 6789'))
+
+    def test_similar_sounding_name_and_email(self):
+        self.assert_duplicate(student('25-00002', 'Juan', 'Dela Crus', 'juan.delacruz@example.com'))
+
+    def test_similar_sounding_name_and_phone_is_allowed(self):
+        # Siblings often share a parent's phone number.
+        self.assert_duplicate(student('25-00002', 'Juana', 'Dela Crus', phone='0912-345-6789'), expected=False)
+
+    def test_same_name_without_shared_contact_is_allowed(self):
+        self.assert_duplicate(student('25-00002', 'Juan', 'Dela Cruz', 'other@example.com', '0917-000-0000'),
+                              expected=False)
+
+    def test_shared_email_with_different_name_is_allowed(self):
+        self.assert_duplicate(student('25-00002', 'Maria', 'Santos', 'juan.delacruz@example.com'), expected=False)
+
+
+class DuplicateRecordsTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.tmpdir.name, 'duplicates.db'))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def insert_unchecked(self, data):
+        # Records entered before the duplicate check existed.
+        conn = self.db.get_connection()
+        conn.execute('''
+            INSERT INTO students (student_id, first_name, middle_name, last_name, email, phone, course)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (data['student_id'], data['first_name'], data['middle_name'], data['last_name'],
+              data['email'], data['phone'], data['course']))
+        conn.commit()
+        conn.close()
+
+    def test_add_rejects_duplicate(self):
+        self.assertTrue(self.db.add_student(student('25-00001', 'Juan', 'Dela Cruz', 'juan@example.com'))['success'])
+        result = self.db.add_student(student('25-00002', 'Juan', 'Dela Crus', 'juan@example.com'))
+        self.assertFalse(result['success'])
+        self.assertIn('Possible Duplicate Record', result['message'])
+
+    def test_clusters_are_merged_through_shared_records(self):
+        self.insert_unchecked(student('25-00001', 'Juan', 'Dela Cruz', 'juan@example.com', '0912-000-0001'))
+        # Same name and phone as 25-00001.
+        self.insert_unchecked(student('25-00002', 'Juan', 'Dela Cruz', 'jdc@example.com', '0912 000 0001'))
+        # Similar-sounding name and same email as 25-00002 only.
+        self.insert_unchecked(student('25-00003', 'Juan', 'Dela Crus', 'jdc@example.com'))
+        self.insert_unchecked(student('25-00004', 'Maria', 'Santos', 'maria@example.com', '0912-000-0004'))
+        self.insert_unchecked(student('25-00005', 'Maria', 'Santos', 'm.santos@example.com', '0912-000-0004'))
+        # Sibling sharing a phone number: not a duplicate.
+        self.insert_unchecked(student('25-00006', 'Mario', 'Santos', phone='0912-000-0004'))
+
+        self.assertEqual(self.db.find_duplicate_clusters(),
+                         [['25-00001', '25-00002', '25-00003'], ['25-00004', '25-00005']])
+
+    def test_update_of_existing_duplicate_is_allowed(self):
+        self.insert_unchecked(student('25-00001', 'Juan', 'Dela Cruz', 'juan@example.com'))
+        self.insert_unchecked(student('25-00002', 'Juan', 'Dela Cruz', 'juan@example.com'))
+        self.db.rebuild_blocking_index()
+
+        data = student('25-00002', 'Juan', 'Dela Cruz', 'juan@example.com')
+        data['year_level'] = '2nd Year'
+        self.assertTrue(self.db.update_student('25-00002', data)['success'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+
+from database import Database
+from trigram import can_fuzzy_match, similarity, trigrams
+
+
+class FuzzySearchTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.tmpdir.name, 'fuzzy.db'))
+        names = [('Juan', 'Santos', 'Dela Cruz'), ('Maria', '', 'Cruz'), ('Santos', 'Maria', 'Cruz'),
+                 ('Ana', '', 'Reyes'), ('Cruzita', 'Lopez', 'Mendoza')]
+        for number, (first, middle, last) in enumerate(names, 1):
+            result = self.db.add_student({
+                'student_id': f'25-{number:05d}',
+                'first_name': first,
+                'middle_name': middle,
+                'last_name': last,
+                'email': f'student{number}@example.com',
+                'phone': f'0912-345-{number:04d}',
+                'course': 'BS Computer Science',
+                'department': 'College of Informatics and Computing Sciences',
+                'year_level': '1st Year',
+                'status': 'Enrolled'
+            })
+            self.assertTrue(result['success'], result['message'])
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def student_ids(self, search_term, **kwargs):
+        return [student[1] for student in self.db.fuzzy_search_student(search_term, **kwargs)]
+
+    def test_spelling_variants_find_the_student(self):
+        for term in ('Delacruz', 'De la Cruz', 'dela crus'):
+            self.assertEqual(self.student_ids(term)[:1], ['25-00001'], term)
+
+    def test_closer_full_names_rank_first(self):
+        # Both share every trigram of "cruz"; the shorter full name is the closer match.
+        self.assertEqual(self.student_ids('cruz')[:2], ['25-00002', '25-00003'])
+
+    def test_threshold_filters_weak_matches(self):
+        self.assertIn('25-00005', self.student_ids('mendosa'))
+        self.assertEqual(self.student_ids('mendosa', threshold=0.5), [])
+        self.assertEqual(self.student_ids('zzzz'), [])
+
+    def test_deleted_students_are_not_matched(self):
+        self.assertTrue(self.db.delete_student('25-00004')['success'])
+        self.assertEqual(self.student_ids('reyes'), [])
+
+    def test_short_terms_are_not_fuzzy_matched(self):
+        self.assertFalse(can_fuzzy_match('Li'))
+        self.assertFalse(can_fuzzy_match('a.b'))
+        self.assertTrue(can_fuzzy_match('Rey'))
+
+    def test_similarity_is_jaccard(self):
+        query, name = trigrams('cruz'), trigrams('santos') | trigrams('cruz')
+        self.assertEqual(similarity(len(query), len(name), len(query & name)), len(query) / len(name))
+        self.assertEqual(similarity(0, 0, 0), 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
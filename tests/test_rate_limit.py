@@ -0,0 +1,86 @@
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+
+from rate_limit import MemoryBucketStore, RateLimiter, SQLiteBucketStore
+
+
+class FixedClockStore(MemoryBucketStore):
+    def __init__(self):
+        super().__init__()
+        self.now = 1000.0
+
+    def take(self, key, capacity, rate, now=None):
+        return super().take(key, capacity, rate, now=self.now)
+
+
+class RateLimiterTest(unittest.TestCase):
+    def setUp(self):
+        self.store = FixedClockStore()
+        self.limiter = RateLimiter({'login': (5, 60)}, self.store)
+
+    def test_burst_then_retry_after(self):
+        for _ in range(5):
+            self.assertEqual(self.limiter.hit('login', '10.0.0.1'), 0)
+        # (5, 60) refills one token every 12 seconds.
+        self.assertEqual(self.limiter.hit('login', '10.0.0.1'), 12)
+
+        self.store.now += 4.5
+        self.assertEqual(self.limiter.hit('login', '10.0.0.1'), 8)
+
+        self.store.now += 7.5
+        self.assertEqual(self.limiter.hit('login', '10.0.0.1'), 0)
+        self.assertEqual(self.limiter.hit('login', '10.0.0.1'), 12)
+
+    def test_callers_have_separate_buckets(self):
+        for _ in range(5):
+            self.limiter.hit('login', '10.0.0.1')
+        self.assertGreater(self.limiter.hit('login', '10.0.0.1'), 0)
+        self.assertEqual(self.limiter.hit('login', '10.0.0.2'), 0)
+
+    def test_refill_is_capped_at_capacity(self):
+        self.limiter.hit('login', '10.0.0.1')
+        self.store.now += 3600
+        for _ in range(5):
+            self.assertEqual(self.limiter.hit('login', '10.0.0.1'), 0)
+        self.assertEqual(self.limiter.hit('login', '10.0.0.1'), 12)
+
+
+class SQLiteBucketStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_name = os.path.join(self.tmpdir.name, 'rate_limit.db')
+        self.store = SQLiteBucketStore(self.db_name)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_buckets_are_shared_between_stores(self):
+        other = SQLiteBucketStore(self.db_name)
+        self.assertEqual(self.store.take('search:a', 2, 0.1, now=50.0), (True, 0))
+        self.assertEqual(other.take('search:a', 2, 0.1, now=50.0), (True, 0))
+        allowed, retry_after = self.store.take('search:a', 2, 0.1, now=50.0)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(retry_after, 10.0)
+
+    def test_falls_back_to_memory_when_locked(self):
+        holder = sqlite3.connect(self.db_name, isolation_level=None)
+        holder.execute('BEGIN IMMEDIATE')
+        try:
+            started = time.monotonic()
+            self.assertEqual(self.store.take('login:a', 1, 0.1), (True, 0))
+            self.assertLess(time.monotonic() - started, 1.0)
+            self.assertIn('login:a', self.store.fallback._buckets)
+            self.assertFalse(self.store.take('login:a', 1, 0.1)[0])
+        finally:
+            holder.execute('ROLLBACK')
+            holder.close()
+
+        count = sqlite3.connect(self.db_name).execute('SELECT COUNT(*) FROM rate_limit_buckets').fetchone()[0]
+        self.assertEqual(count, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
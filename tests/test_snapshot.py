@@ -0,0 +1,71 @@
+import os
+import random
+import tempfile
+import unittest
+
+from database import Database, SORT_COLUMNS
+
+
+class RosterSnapshotParityTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        db_name = os.path.join(self.tmpdir.name, 'snapshot.db')
+        self.sql = Database(db_name)
+        self.cached = Database(db_name, snapshot=True)
+        self.random = random.Random(7)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def student(self, number):
+        choice = self.random.choice
+        return {
+            'student_id': f'25-{number:05d}',
+            'first_name': choice(['Ana', 'Ben', 'Carlo', 'ana']),
+            'middle_name': choice(['', 'Lopez', 'Mendoza']),
+            'last_name': choice(['Dela Cruz', 'Santos', 'Reyes']),
+            'email': f'student{number}@example.com',
+            'phone': f'0912-345-{number:04d}',
+            'course': choice(['BS Computer Science', 'BS Information Technology', 'BS Civil Engineering']),
+            'department': choice(['College of Engineering', 'College of Informatics and Computing Sciences', None]),
+            'year_level': choice(['1st Year', '2nd Year', '3rd Year']),
+            'status': choice(['Enrolled', 'Dropped', 'Graduated'])
+        }
+
+    def assert_parity(self):
+        for sort_column in list(SORT_COLUMNS) + ['unknown']:
+            for direction in ('asc', 'desc'):
+                self.assertEqual(self.cached.get_all_students(sort_column, direction),
+                                 self.sql.get_all_students(sort_column, direction),
+                                 f'listing by {sort_column} {direction}')
+                for term in ('cics', 'coe', 'san', 'ENROL', '1', 'lopez', '2nd'):
+                    self.assertEqual(self.cached.search_student(term, sort_column, direction),
+                                     self.sql.search_student(term, sort_column, direction),
+                                     f'search {term!r} by {sort_column} {direction}')
+
+    def test_matches_sql_after_random_writes(self):
+        for number in range(120):
+            self.assertTrue(self.cached.add_student(self.student(number))['success'])
+        self.assert_parity()
+
+        for number in range(0, 120, 7):
+            self.assertTrue(self.cached.delete_student(f'25-{number:05d}')['success'])
+        for number in range(1, 120, 5):
+            if number % 7 == 0:
+                continue
+            self.assertTrue(self.cached.update_student(f'25-{number:05d}', self.student(number))['success'])
+        # New students reuse the slots freed by the deletes above.
+        for number in range(120, 150):
+            self.assertTrue(self.cached.add_student(self.student(number))['success'])
+
+        self.assertEqual(len(self.cached.snapshot), len(self.sql.get_all_students()))
+        self.assert_parity()
+
+    def test_wildcard_terms_fall_back_to_sql(self):
+        self.assertTrue(self.cached.add_student(self.student(1))['success'])
+        self.assertEqual(self.cached.search_student('25_0'), self.sql.search_student('25_0'))
+        self.assertEqual(self.cached.search_student('%'), self.sql.search_student('%'))
+
+
+if __name__ == '__main__':
+    unittest.main()
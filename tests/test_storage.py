@@ -0,0 +1,184 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import types
+import unittest
+
+from database import Database
+from storage import ConnectionPool, DBAPIBackend
+
+
+class DBAPIStandInTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        db_name = os.path.join(self.tmpdir.name, 'standin.db')
+        self.db = Database(db_name, backend=DBAPIBackend.sqlite_stand_in(db_name, pool_size=2))
+        self.student = {
+            'student_id': '25-00001',
+            'first_name': 'Juan',
+            'middle_name': '',
+            'last_name': 'Dela Cruz',
+            'email': 'juan@example.com',
+            'phone': '0912-345-6789',
+            'course': 'BS Computer Science',
+            'department': 'College of Informatics and Computing Sciences',
+            'year_level': '1st Year',
+            'status': 'Enrolled'
+        }
+
+    def tearDown(self):
+        self.db.backend.pool.close_all()
+        self.tmpdir.cleanup()
+
+    def test_login_and_user_creation(self):
+        self.assertTrue(self.db.verify_login('admin', 'admin123')['success'])
+        self.assertTrue(self.db.create_user('registrar', 'secret', 'Maria', 'Santos')['success'])
+        self.assertFalse(self.db.create_user('registrar', 'secret', 'Maria', 'Santos')['success'])
+        self.assertTrue(self.db.verify_login('registrar', 'secret')['success'])
+        self.assertFalse(self.db.verify_login('registrar', 'wrong')['success'])
+
+    def test_student_crud_and_search(self):
+        self.assertTrue(self.db.add_student(self.student)['success'])
+        same_id = dict(self.student, first_name='Pedro', email='pedro@example.com', phone='0999-000-0000')
+        self.assertEqual(self.db.add_student(same_id)['message'], 'Student ID already exists')
+
+        self.assertEqual(len(self.db.get_all_students('name', 'desc')), 1)
+        self.assertEqual(len(self.db.search_student('CICS')), 1)
+
+        updated = dict(self.student, status='Dropped')
+        self.assertTrue(self.db.update_student('25-00001', updated)['success'])
+        self.assertIn('Dropped', self.db.get_all_students()[0])
+
+        self.assertTrue(self.db.delete_student('25-00001')['success'])
+        self.assertFalse(self.db.delete_student('25-00001')['success'])
+        self.assertEqual(self.db.get_all_students(), [])
+
+    def test_pooled_connections_are_shared_across_threads(self):
+        self.assertTrue(self.db.add_student(self.student)['success'])
+        results = []
+
+        def list_students():
+            results.append(len(self.db.get_all_students()))
+
+        threads = [threading.Thread(target=list_students) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, [1] * 6)
+
+
+class _PyformatCursor:
+    # Formats like psycopg2: any params argument, even (), triggers %-interpolation.
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, query, params=None):
+        if params is None:
+            self._cursor.execute(query)
+        else:
+            self._cursor.execute(query % tuple('?' for _ in params), params)
+
+    def executemany(self, query, seq_of_params):
+        seq_of_params = list(seq_of_params)
+        if seq_of_params:
+            self._cursor.executemany(query % tuple('?' for _ in seq_of_params[0]), seq_of_params)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class _PyformatConnection:
+    def __init__(self, *args, **kwargs):
+        self._conn = sqlite3.connect(*args, check_same_thread=False, **kwargs)
+        self.broken = False
+
+    def cursor(self):
+        if self.broken:
+            raise sqlite3.OperationalError('server closed the connection unexpectedly')
+        return _PyformatCursor(self._conn.cursor())
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        if self.broken:
+            raise sqlite3.OperationalError('server closed the connection unexpectedly')
+        self._conn.rollback()
+
+    def close(self):
+        self._conn.close()
+
+
+pyformat_driver = types.SimpleNamespace(
+    paramstyle='pyformat',
+    connect=_PyformatConnection,
+    IntegrityError=sqlite3.IntegrityError,
+    OperationalError=sqlite3.OperationalError
+)
+
+
+class PyformatDriverTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        db_name = os.path.join(self.tmpdir.name, 'pyformat.db')
+        self.db = Database(db_name, backend=DBAPIBackend(pyformat_driver, db_name, pool_size=1,
+                                                         id_column='INTEGER PRIMARY KEY AUTOINCREMENT'))
+
+    def tearDown(self):
+        self.db.backend.pool.close_all()
+        self.tmpdir.cleanup()
+
+    def test_crud_login_and_search_with_percent_signs(self):
+        self.assertTrue(self.db.verify_login('admin', 'admin123')['success'])
+        student = {
+            'student_id': '25-00001', 'first_name': 'Juan', 'middle_name': '', 'last_name': 'Dela Cruz',
+            'email': 'juan@example.com', 'phone': '0912-345-6789', 'course': 'BS Computer Science',
+            'department': 'College of Informatics and Computing Sciences', 'year_level': '1st Year',
+            'status': 'Enrolled'
+        }
+        self.assertTrue(self.db.add_student(student)['success'])
+        self.assertEqual(len(self.db.search_student('juan', 'name', 'desc')), 1)
+        self.assertEqual(self.db.search_student('100%'), [])
+        self.assertEqual(len(self.db.fuzzy_search_student('delacrus')), 1)
+        self.assertTrue(self.db.delete_student('25-00001')['success'])
+
+    def test_literal_percent_signs_survive_translation(self):
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT 'name:%'")
+        self.assertEqual(cursor.fetchone()[0], 'name:%')
+        cursor.execute("SELECT 'name:%' || ?", ('x',))
+        self.assertEqual(cursor.fetchone()[0], 'name:%x')
+        conn.close()
+
+    def test_dead_idle_connection_is_replaced(self):
+        self.assertTrue(self.db.create_user('registrar', 'secret', 'Maria', 'Santos')['success'])
+        conn = self.db.get_connection()
+        raw = conn._conn
+        conn.close()
+        raw.broken = True
+
+        # A login failure here would come back as "Database error", not an exception.
+        self.assertTrue(self.db.verify_login('registrar', 'secret')['success'])
+        self.assertIsNot(self.db.get_connection()._conn, raw)
+
+
+class ConnectionPoolTest(unittest.TestCase):
+    def test_connections_older_than_max_age_are_recycled(self):
+        opened = []
+
+        def factory():
+            opened.append(sqlite3.connect(':memory:'))
+            return opened[-1]
+
+        pool = ConnectionPool(factory, size=1, max_age=0)
+        pool.acquire().close()
+        pool.acquire().close()
+        self.assertEqual(len(opened), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+# Scores are taken over all of a student's names, so a typo in one of three
+# names already lands well below 0.5.
+DEFAULT_THRESHOLD = 0.2
+
+# Shorter terms yield too few trigrams for a similarity score to mean anything.
+MIN_FUZZY_LETTERS = 3
+
+
+def normalize_name(value):
+    """Lowercase and drop spaces and punctuation, so "De la Cruz" == "Delacruz"."""
+    return ''.join(ch for ch in (value or '').lower() if ch.isalpha())
+
+
+def can_fuzzy_match(value):
+    return len(normalize_name(value)) >= MIN_FUZZY_LETTERS
+
+
+def trigrams(value):
+    name = normalize_name(value)
+    if not name:
+        return set()
+    padded = f'  {name} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def name_trigrams(*names):
+    grams = set()
+    for name in names:
+        grams |= trigrams(name)
+    return grams
+
+
+def similarity(query_size, name_size, shared):
+    """Jaccard similarity of the query's and a student's trigram sets (0.0 to 1.0)."""
+    union = query_size + name_size - shared
+    return shared / union if union else 0.0
@@ -123,3 +123,76 @@ def sanitize_student_data(data):
             sanitized[key] = value
     
     return sanitized
+
+
+def normalize_email(email):
+    return (email or '').strip().lower()
+
+
+def phone_digits(phone):
+    return ''.join(ch for ch in (phone or '') if ch.isdigit())
+
+
+def normalize_full_name(first_name, last_name):
+    return ''.join(ch for ch in f'{first_name or ""}{last_name or ""}'.lower() if ch.isalpha())
+
+
+def soundex(name):
+    letters = [ch for ch in (name or '').upper() if ch.isalpha() and ch.isascii()]
+    if not letters:
+        return ''
+    codes = {}
+    for group, digit in (('BFPV', '1'), ('CGJKQSXZ', '2'), ('DT', '3'), ('L', '4'), ('MN', '5'), ('R', '6')):
+        for ch in group:
+            codes[ch] = digit
+    
+    result = letters[0]
+    previous = codes.get(letters[0], '')
+    for ch in letters[1:]:
+        digit = codes.get(ch, '')
+        if digit and digit != previous:
+            result += digit
+        if ch not in 'HW':
+            previous = digit
+    return (result + '000')[:4]
+
+
+def student_blocking_keys(data):
+    # Every duplicate shares an email or phone with its original (see duplicate_match_keys).
+    keys = []
+    email = normalize_email(data.get('email'))
+    if email:
+        keys.append(f'email:{email}')
+    phone = phone_digits(data.get('phone'))
+    if phone:
+        keys.append(f'phone:{phone}')
+    return keys
+
+
+def duplicate_match_keys(data):
+    name = normalize_full_name(data.get('first_name'), data.get('last_name'))
+    if not name:
+        return []
+    keys = []
+    email = normalize_email(data.get('email'))
+    phone = phone_digits(data.get('phone'))
+    if email:
+        keys.append(f'{name}|email:{email}')
+    if phone:
+        keys.append(f'{name}|phone:{phone}')
+    
+    # A similar-sounding name only counts with a shared email: siblings often list a parent's phone.
+    last_code = soundex(data.get('last_name'))
+    first_code = soundex(data.get('first_name'))
+    if email and last_code and first_code:
+        keys.append(f'{last_code}-{first_code}|email:{email}')
+    return keys
+
+
+def check_duplicate_student(data, candidates):
+    match_keys = set(duplicate_match_keys(data))
+    for candidate in candidates:
+        if match_keys & set(duplicate_match_keys(candidate)):
+            return {'valid': False, 'message': f'Possible Duplicate Record: A student with the same or a similar-sounding name and the same email or phone number is already enrolled under Student ID {candidate["student_id"]}. Please update that record instead of creating a new one.'}
+    
+    return {'valid': True, 'message': 'No duplicate found'}